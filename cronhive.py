@@ -1,24 +1,59 @@
 """CronHive - Cross-infrastructure cron job discovery, inventory & dead-job alerting."""
+import asyncio
 import dataclasses
 import datetime
+import functools
 import json
 import os
 import re
-import subprocess
 import sys
 
 from croniter import croniter
 
+try:
+    import orjson
+except ImportError:  # optional: faster JSON output for large inventories
+    orjson = None
+
 SECRET_RE = re.compile(
-    r"(password|secret|token|api[_\-]?key|credentials)\s*[=:]\s*\S+", re.I
+    r"(password|secret|token|api[_-]?key|credentials)\s*[=:]\s*\S+", re.I
 )
+# Cheap substring hints, matched against cmd.casefold(); SECRET_RE only runs
+# when one appears. casefold() maps the re.I variants of "s" and "k" (U+017F,
+# U+212A) but not dotless/dotted "i", so no hint may contain an "i".
+_SECRET_HINTS = ("password", "secret", "token", "key", "credent")
 SPECIAL_SCHEDS = {
     "@reboot", "@yearly", "@annually", "@monthly",
     "@weekly", "@daily", "@midnight", "@hourly",
 }
+# scan_file only reads crontabs that resolve (after symlinks) to these locations;
+# entries ending in "/" are directories, the rest must match exactly.
+ALLOWED_PATHS = ("/etc/crontab", "/etc/cron.d/", "/var/spool/cron/")
+_WS_RE = re.compile(r"\s+")
+# Any whitespace other than a lone " " (tabs, doubled spaces, NBSP, ...).
+_IRREGULAR_WS_RE = re.compile(r"\s\s|[^\S ]")
+# Classifies a raw crontab line in one match: comments and VAR=value lines
+# are recognised (and skipped); @-schedules and five-field schedules come
+# back pre-split from their command. Blank or short lines do not match.
+_LINE_RE = re.compile(
+    r"\s*(?:"
+    r"(?P<comment>#.*)"
+    r"|(?P<env>[^\s=]*=\S*\s+\S.*)"
+    r"|(?P<special>@\S*)\s+(?P<special_cmd>\S(?:.*\S)?)"
+    r"|(?P<sched>\S+(?:\s+\S+){4})\s+(?P<cmd>\S(?:.*\S)?)"
+    r")\s*"
+)
+# Exact fire periods (seconds) for @-schedules; @monthly/@yearly vary in length.
+_KNOWN_INTERVALS = {
+    "@hourly": 3600.0, "@daily": 86400.0, "@midnight": 86400.0, "@weekly": 604800.0,
+}
+# Plain numeric cron atom: "*" or "N" or "N-M", optionally "/step".
+_FIELD_RE = re.compile(r"(\*|(\d+)(?:-(\d+))?)(?:/(\d+))?")
+# (min, max) per field: minute, hour, day-of-month, month, day-of-week.
+_FIELD_BOUNDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
 
 
-@dataclasses.dataclass
+@dataclasses.dataclass(slots=True)
 class CronJob:
     source: str
     schedule: str
@@ -26,66 +61,213 @@ class CronJob:
     user: str = ""
     valid: bool = True
 
+    def to_dict(self):
+        """Shallow dict of fields; cheaper than dataclasses.asdict's deepcopy."""
+        return {
+            "source": self.source, "schedule": self.schedule, "command": self.command,
+            "user": self.user, "valid": self.valid,
+        }
+
+
+def _may_contain_secret(cmd):
+    """Fast check run before SECRET_RE; may give false positives, never false negatives."""
+    folded = cmd.casefold()
+    return any(h in folded for h in _SECRET_HINTS)
+
 
 def redact(cmd):
     """Redact potential secrets from command strings."""
+    if not _may_contain_secret(cmd):
+        return cmd
     return SECRET_RE.sub(lambda m: m.group(1) + "=***", cmd)
 
 
+@functools.lru_cache(maxsize=1024)
+def _compiled_base(expr):
+    """Parse a cron expression once; return a croniter prototype or None."""
+    try:
+        return croniter(expr)
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+@functools.lru_cache(maxsize=1024)
+def _uniform_interval(expr):
+    """Seconds between fires if the schedule fires at a fixed period, else None.
+
+    Schedules with wildcard day/month/weekday fields qualify when their fire
+    times within a day are evenly spaced, wrap included; a single weekday
+    with one fire time per day is a fixed weekly period.
+    """
+    known = _KNOWN_INTERVALS.get(expr)
+    if known is not None:
+        return known
+    base = _compiled_base(expr)
+    if base is None or len(base.expanded) != 5:
+        return None
+    minutes, hours, dom, month, dow = base.expanded
+    if dom != ["*"] or month != ["*"] or base.nth_weekday_of_month:
+        return None  # "5#2" / "L5" expand to a plain weekday but fire monthly
+    weekly = dow != ["*"]
+    if weekly and len(dow) != 1:
+        return None
+    minutes = range(60) if minutes == ["*"] else minutes
+    hours = range(24) if hours == ["*"] else hours
+    times = sorted(h * 60 + m for h in hours for m in minutes)
+    if weekly:
+        return 604800.0 if len(times) == 1 else None
+    gaps = {b - a for a, b in zip(times, times[1:])}
+    gaps.add(times[0] + 1440 - times[-1])
+    return gaps.pop() * 60.0 if len(gaps) == 1 else None
+
+
+def _fast_valid(expr):
+    """Accept plain numeric 5-field expressions without invoking croniter.
+
+    Returns False when unsure (names, L/W/#, reversed ranges); callers
+    then fall back to the full croniter parse.
+    """
+    parts = expr.split()
+    if len(parts) != 5:
+        return False
+    for field, (lo, hi) in zip(parts, _FIELD_BOUNDS):
+        for atom in field.split(","):
+            m = _FIELD_RE.fullmatch(atom)
+            if not m:
+                return False
+            start, end, step = m.group(2), m.group(3), m.group(4)
+            if step is not None and int(step) == 0:
+                return False
+            if start is not None:
+                a = int(start)
+                b = int(end) if end is not None else a
+                if not lo <= a <= b <= hi:
+                    return False
+    return True
+
+
 def validate_schedule(expr):
     """Validate a cron expression."""
     if not isinstance(expr, str) or not expr.strip():
         return False
     if expr.startswith("@"):
         return expr in SPECIAL_SCHEDS
-    try:
-        croniter(expr)
+    if _fast_valid(expr):
         return True
-    except (ValueError, KeyError, TypeError):
-        return False
+    return _compiled_base(expr) is not None
+
+
+def _split_n_whitespace(line, n):
+    """Split a stripped line after its n-th field into (head, rest) slices.
+
+    Returns None when nothing follows the n-th field.
+    """
+    for i, m in enumerate(_WS_RE.finditer(line), 1):
+        if i == n:
+            return line[:m.start()], line[m.end():]
+    return None
 
 
 def parse_crontab(text, source="unknown", system=False):
     """Parse crontab text into CronJob list. system=True expects user field."""
-    jobs = []
-    for raw in text.splitlines():
-        line = raw.strip()
-        if not line or line.startswith("#"):
-            continue
-        tokens = line.split()
-        if len(tokens) >= 2 and "=" in tokens[0]:
-            continue
-        if line.startswith("@"):
-            parts = line.split(None, 2 if system else 1)
-            need = 3 if system else 2
-            if len(parts) >= need:
-                sched, user = parts[0], (parts[1] if system else "")
-                cmd = parts[-1]
-                jobs.append(CronJob(source, sched, redact(cmd), user, validate_schedule(sched)))
+    return parse_crontab_lines(
+        text.splitlines(), source=source, system=system, size_hint=text.count("\n") + 1
+    )
+
+
+def parse_crontab_lines(lines, source="unknown", system=False, size_hint=0):
+    """Parse an iterable of crontab lines (e.g. an open file) into CronJob list.
+
+    size_hint, when known, preallocates the result instead of growing it.
+    """
+    if isinstance(source, str):
+        source = sys.intern(source)
+    jobs = [None] * size_hint
+    k = 0
+    for raw in lines:
+        m = _LINE_RE.fullmatch(raw)
+        if m is None:
             continue
-        parts = line.split(None, 6 if system else 5)
-        need = 7 if system else 6
-        if len(parts) < need:
+        if m.group("special") is not None:
+            sched, cmd = m.group("special", "special_cmd")
+            valid = sched in SPECIAL_SCHEDS
+        elif m.group("sched") is not None:
+            sched, cmd = m.group("sched", "cmd")
+            if _IRREGULAR_WS_RE.search(sched):
+                sched = " ".join(sched.split())
+            valid = validate_schedule(sched)
+        else:
             continue
-        sched = " ".join(parts[:5])
-        user = parts[5] if system else ""
-        cmd = parts[6] if system else parts[5]
-        jobs.append(CronJob(source, sched, redact(cmd), user, validate_schedule(sched)))
+        user = ""
+        if system:
+            split = _split_n_whitespace(cmd, 1)
+            if split is None:
+                continue
+            user, cmd = split
+            user = sys.intern(user)
+        job = CronJob(source, sched, redact(cmd), user, valid)
+        if k < size_hint:
+            jobs[k] = job
+        else:
+            jobs.append(job)
+        k += 1
+    del jobs[k:]
     return jobs
 
 
+def _resolve_allowed(paths):
+    """realpath() each allowlist entry, keeping the trailing "/" on directories."""
+    return tuple(
+        os.path.realpath(p) + ("/" if p.endswith("/") else "") for p in paths
+    )
+
+
+# Resolved once, so hosts where /etc or /var is a symlink still match.
+_ALLOWED_REAL = _resolve_allowed(ALLOWED_PATHS)
+
+
+def _path_allowed(real):
+    """True if a resolved path is one of, or lives under, ALLOWED_PATHS."""
+    return any(
+        real == a.rstrip("/") or (a.endswith("/") and real.startswith(a))
+        for a in _ALLOWED_REAL
+    )
+
+
 def scan_file(path, system=False):
-    """Scan a crontab file with path traversal protection."""
-    if ".." in path:
-        return []
+    """Scan a crontab file; only resolved paths under ALLOWED_PATHS are read."""
     real = os.path.realpath(path)
+    if not _path_allowed(real):
+        return []
     try:
         with open(real) as f:
-            return parse_crontab(f.read(), source=real, system=system)
+            return parse_crontab_lines(f, source=real, system=system)
     except (PermissionError, FileNotFoundError, OSError):
         return []
 
 
+async def _read_user_crontab():
+    """Scan the invoking user's crontab via `crontab -l`."""
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            "crontab", "-l",
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL,
+        )
+    except FileNotFoundError:
+        print("Warning: could not read user crontab", file=sys.stderr)
+        return []
+    try:
+        out, _ = await asyncio.wait_for(proc.communicate(), timeout=10)
+    except asyncio.TimeoutError:
+        proc.kill()
+        await proc.wait()
+        print("Warning: could not read user crontab", file=sys.stderr)
+        return []
+    if proc.returncode != 0:
+        return []
+    return parse_crontab(out.decode(), source="user:" + os.getenv("USER", "?"))
+
+
 def is_dead(schedule, last_run, now=None):
     """Check if a job missed its expected run window."""
     now = now or datetime.datetime.now()
@@ -96,46 +278,85 @@ def is_dead(schedule, last_run, now=None):
     try:
         it = croniter(schedule, last_run)
         expected = it.get_next(datetime.datetime)
-        next_after = it.get_next(datetime.datetime)
-        interval = (next_after - expected).total_seconds()
+        interval = _uniform_interval(schedule)
+        if interval is None:
+            next_after = it.get_next(datetime.datetime)
+            interval = (next_after - expected).total_seconds()
         overdue = (now - expected).total_seconds()
         return overdue > interval * 2, expected
     except Exception:
         return True, None
 
 
-def inventory(jobs):
-    """Generate inventory report dict."""
+def _report_header(total, valid, now=None):
+    """Shared report header: generated_at (UTC, 'Z'-suffixed) and job counts."""
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    utc = now.astimezone(datetime.timezone.utc).replace(tzinfo=None)
     return {
-        "generated_at": datetime.datetime.utcnow().isoformat() + "Z",
-        "total": len(jobs),
-        "valid": sum(1 for j in jobs if j.valid),
-        "invalid": sum(1 for j in jobs if not j.valid),
-        "jobs": [dataclasses.asdict(j) for j in jobs],
+        "generated_at": utc.isoformat() + "Z",
+        "total": total,
+        "valid": valid,
+        "invalid": total - valid,
     }
 
 
+def inventory(jobs, now=None):
+    """Generate inventory report dict. `now` (aware) defaults to the current time."""
+    valid = 0
+    dicts = []
+    for j in jobs:
+        dicts.append(j.to_dict())
+        valid += j.valid
+    report = _report_header(len(dicts), valid, now)
+    report["jobs"] = dicts
+    return report
+
+
+async def _amain(args):
+    """Scan all requested sources concurrently; returns jobs in argument order."""
+    tasks = [asyncio.to_thread(scan_file, f, args.system) for f in args.scan_file]
+    if args.scan_user:
+        tasks.append(_read_user_crontab())
+    jobs = []
+    for res in await asyncio.gather(*tasks):
+        jobs.extend(res)
+    return jobs
+
+
+def _dumps(obj, indent=True):
+    """Serialize to JSON (indented, or compact for NDJSON), via orjson when installed."""
+    if orjson is not None:
+        opt = orjson.OPT_NAIVE_UTC | (orjson.OPT_INDENT_2 if indent else 0)
+        return orjson.dumps(obj, option=opt).decode()
+    if indent:
+        return json.dumps(obj, indent=2, default=str)
+    return json.dumps(obj, default=str)
+
+
+def write_ndjson(jobs, out, now=None):
+    """Stream a header line with the counts, then one JSON line per job, to `out`."""
+    header = _report_header(len(jobs), sum(j.valid for j in jobs), now)
+    out.write(_dumps(header, indent=False) + "\n")
+    for j in jobs:
+        out.write(_dumps(j.to_dict(), indent=False) + "\n")
+
+
 def main():
     import argparse
     p = argparse.ArgumentParser(description="CronHive - cron discovery & alerting")
     p.add_argument("--scan-file", action="append", default=[], help="Crontab file")
     p.add_argument("--system", action="store_true", help="System crontab format")
     p.add_argument("--scan-user", action="store_true", help="Scan user crontab")
-    p.add_argument("--output", choices=["json", "text"], default="text")
+    p.add_argument("--output", choices=["json", "ndjson", "text"], default="text")
     args = p.parse_args()
-    jobs = []
-    for f in args.scan_file:
-        jobs.extend(scan_file(f, system=args.system))
-    if args.scan_user:
-        try:
-            r = subprocess.run(["crontab", "-l"], capture_output=True, text=True, timeout=10)
-            if r.returncode == 0:
-                jobs.extend(parse_crontab(r.stdout, source="user:" + os.getenv("USER", "?")))
-        except (FileNotFoundError, subprocess.TimeoutExpired):
-            print("Warning: could not read user crontab", file=sys.stderr)
-    report = inventory(jobs)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    jobs = asyncio.run(_amain(args))
+    if args.output == "ndjson":
+        write_ndjson(jobs, sys.stdout, now=now)
+        return
+    report = inventory(jobs, now=now)
     if args.output == "json":
-        print(json.dumps(report, indent=2, default=str))
+        print(_dumps(report))
     else:
         print(f"CronHive: {report['total']} jobs ({report['valid']} valid, {report['invalid']} invalid)")
         for j in report["jobs"]:
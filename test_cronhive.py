@@ -1,7 +1,7 @@
 """Tests for CronHive."""
 import datetime
 import pytest
-from cronhive import parse_crontab, validate_schedule, redact, is_dead, inventory, CronJob, scan_file
+from cronhive import SECRET_RE, parse_crontab, parse_crontab_lines, validate_schedule, redact, is_dead, inventory, CronJob, scan_file
 
 
 def test_parse_user_crontab():
@@ -33,6 +33,12 @@ def test_parse_special_schedules():
     assert jobs[1].schedule == "@daily"
 
 
+def test_parse_unknown_special_schedule_invalid():
+    jobs = parse_crontab("@bogus /bin/task\n", source="test")
+    assert len(jobs) == 1
+    assert jobs[0].valid is False
+
+
 def test_validate_schedule_valid():
     assert validate_schedule("*/5 * * * *") is True
     assert validate_schedule("0 2 * * 1-5") is True
@@ -96,14 +102,84 @@ def test_inventory_report():
     assert report["valid"] == 1
     assert report["invalid"] == 1
     assert len(report["jobs"]) == 2
+    assert report["jobs"][1] == {
+        "source": "test", "schedule": "bad", "command": "/bin/job2",
+        "user": "", "valid": False,
+    }
     assert "generated_at" in report
 
 
+def test_inventory_uses_given_now():
+    now = datetime.datetime(2024, 6, 15, 12, 0, 0, tzinfo=datetime.timezone.utc)
+    report = inventory([], now=now)
+    assert report["generated_at"] == "2024-06-15T12:00:00Z"
+
+
+def test_inventory_converts_non_utc_now():
+    now = datetime.datetime(
+        2024, 6, 15, 14, 0, 0, tzinfo=datetime.timezone(datetime.timedelta(hours=2))
+    )
+    assert inventory([], now=now)["generated_at"] == "2024-06-15T12:00:00Z"
+
+
+def test_ndjson_header_matches_inventory():
+    import io
+    import json
+    from cronhive import write_ndjson
+    jobs = [CronJob("test", "@daily", "/bin/a"), CronJob("test", "bad", "/bin/b", valid=False)]
+    now = datetime.datetime(
+        2024, 6, 15, 14, 0, 0, tzinfo=datetime.timezone(datetime.timedelta(hours=2))
+    )
+    out = io.StringIO()
+    write_ndjson(jobs, out, now=now)
+    header = json.loads(out.getvalue().splitlines()[0])
+    report = inventory(jobs, now=now)
+    del report["jobs"]
+    assert header == report
+
+
 def test_scan_file_path_traversal():
     result = scan_file("../../etc/shadow")
     assert result == []
 
 
+def test_scan_file_outside_allowlist(tmp_path):
+    crontab = tmp_path / "crontab"
+    crontab.write_text("*/5 * * * * /bin/task\n")
+    assert scan_file(str(crontab)) == []
+    link = tmp_path / "link"
+    link.symlink_to("/etc/shadow")
+    assert scan_file(str(link)) == []
+
+
+def test_path_allowed():
+    from cronhive import _path_allowed
+    assert _path_allowed("/etc/crontab") is True
+    assert _path_allowed("/etc/cron.d/..name") is True
+    assert _path_allowed("/var/spool/cron/crontabs/root") is True
+    assert _path_allowed("/etc/cron.d") is True
+    assert _path_allowed("/etc/cron.dx/job") is False
+    assert _path_allowed("/etc/crontab.bak") is False
+    assert _path_allowed("/etc/shadow") is False
+
+
+def test_scan_file_symlinked_allowed_root(tmp_path, monkeypatch):
+    import cronhive
+    private_etc = tmp_path / "private" / "etc"
+    (private_etc / "cron.d").mkdir(parents=True)
+    (private_etc / "crontab").write_text("@daily root /bin/a\n")
+    (private_etc / "cron.d" / "job").write_text("@hourly root /bin/b\n")
+    etc = tmp_path / "etc"
+    etc.symlink_to(private_etc)
+    monkeypatch.setattr(
+        cronhive, "_ALLOWED_REAL",
+        cronhive._resolve_allowed((f"{etc}/crontab", f"{etc}/cron.d/")),
+    )
+    assert [j.command for j in scan_file(f"{etc}/crontab", system=True)] == ["/bin/a"]
+    assert [j.command for j in scan_file(f"{etc}/cron.d/job", system=True)] == ["/bin/b"]
+    assert scan_file(f"{etc}/crontab.bak") == []
+
+
 def test_scan_file_nonexistent():
     result = scan_file("/nonexistent/crontab")
     assert result == []
@@ -114,3 +190,215 @@ def test_parse_skips_comments_and_env():
     jobs = parse_crontab(text, source="test")
     assert len(jobs) == 1
     assert jobs[0].command == "/bin/task"
+
+
+def test_validate_schedule_cached():
+    from cronhive import _compiled_base
+    _compiled_base.cache_clear()
+    for _ in range(3):
+        assert validate_schedule("0 0 * * MON") is True
+        assert validate_schedule("nope nope") is False
+    info = _compiled_base.cache_info()
+    assert info.misses == 2
+    assert info.hits == 4
+
+
+def test_redact_prefilter_case_insensitive():
+    assert redact("/bin/clean --verbose") == "/bin/clean --verbose"
+    assert "Hunter2" not in redact("cmd PASSWORD=Hunter2")
+    assert redact("cmd --keyfile /etc/x") == "cmd --keyfile /etc/x"
+
+
+def test_redact_long_token_and_wide_separator():
+    cmd = "x" * 10000 + " password=" + "A" * 100000
+    out = redact(cmd)
+    assert "A" not in out
+    assert out.endswith("password=***")
+    assert redact("cmd PASSWORD     =x") == "cmd PASSWORD=***"
+
+
+def test_validate_schedule_fast_path_bounds():
+    assert validate_schedule("59 23 31 12 7") is True
+    assert validate_schedule("0,15,30,45 9-17 * * 1-5") is True
+    assert validate_schedule("99 * * * *") is False
+    assert validate_schedule("*/0 * * * *") is False
+    assert validate_schedule("0 0 0 * *") is False
+    assert validate_schedule("0 0 * JAN *") is True
+
+
+def test_parse_crontab_lines_from_file(tmp_path):
+    path = tmp_path / "crontab"
+    path.write_text("# header\n*/5 * * * * root /bin/a\n@daily root /bin/b\n")
+    with open(path) as f:
+        jobs = parse_crontab_lines(f, source="f", system=True)
+    assert [j.command for j in jobs] == ["/bin/a", "/bin/b"]
+    assert jobs[0].user == "root"
+
+
+def test_read_user_crontab(tmp_path, monkeypatch):
+    import asyncio
+    from cronhive import _read_user_crontab
+    fake = tmp_path / "crontab"
+    fake.write_text("#!/bin/sh\necho '@daily /bin/user_task'\n")
+    fake.chmod(0o755)
+    monkeypatch.setenv("PATH", str(tmp_path))
+    jobs = asyncio.run(_read_user_crontab())
+    assert len(jobs) == 1
+    assert jobs[0].command == "/bin/user_task"
+    assert jobs[0].source.startswith("user:")
+
+
+def test_cronjob_to_dict_matches_asdict():
+    import dataclasses
+    job = CronJob("/etc/crontab", "@daily", "/bin/x", "root", True)
+    assert job.to_dict() == dataclasses.asdict(job)
+
+
+def test_uniform_interval():
+    from cronhive import _uniform_interval
+    assert _uniform_interval("*/5 * * * *") == 300
+    assert _uniform_interval("0 */6 * * *") == 6 * 3600
+    assert _uniform_interval("@daily") == 86400
+    assert _uniform_interval("@weekly") == 604800
+    assert _uniform_interval("30 4 * * 1") == 604800
+    assert _uniform_interval("30 4,5 * * 1") is None
+    assert _uniform_interval("@monthly") is None
+    assert _uniform_interval("*/7 * * * *") is None
+    assert _uniform_interval("0 2 * * 1-5") is None
+
+
+def test_dead_weekday_schedule_over_weekend():
+    # Friday 02:00 run; next gap to Monday is 3 days, so Sunday is not overdue.
+    last = datetime.datetime(2024, 6, 13, 3, 0, 0)
+    now = datetime.datetime(2024, 6, 16, 12, 0, 0)
+    dead, expected = is_dead("0 2 * * 1-5", last, now)
+    assert expected == datetime.datetime(2024, 6, 14, 2, 0, 0)
+    assert dead is False
+
+
+def test_dumps_roundtrip(monkeypatch):
+    import json
+    import cronhive
+    report = inventory([CronJob("test", "@daily", "/bin/x")])
+    assert json.loads(cronhive._dumps(report)) == report
+    monkeypatch.setattr(cronhive, "orjson", None)
+    assert json.loads(cronhive._dumps(report)) == report
+
+
+def test_parse_irregular_whitespace():
+    text = "*/5\t*  * * *   root\t/bin/task  --flag\n@daily\troot  /bin/d\n"
+    jobs = parse_crontab(text, source="test", system=True)
+    assert jobs[0].schedule == "*/5 * * * *"
+    assert jobs[0].user == "root"
+    assert jobs[0].command == "/bin/task  --flag"
+    assert (jobs[1].schedule, jobs[1].user, jobs[1].command) == ("@daily", "root", "/bin/d")
+
+
+def test_parse_crontab_size_hint_bounds():
+    assert parse_crontab("", source="test") == []
+    jobs = parse_crontab_lines(["@daily /bin/a", "@hourly /bin/b"], size_hint=1)
+    assert [j.command for j in jobs] == ["/bin/a", "/bin/b"]
+    jobs = parse_crontab("@daily /bin/a\r@hourly /bin/b", source="test")
+    assert len(jobs) == 2
+
+
+def test_cronjob_uses_slots():
+    job = CronJob("test", "@daily", "/bin/x")
+    assert not hasattr(job, "__dict__")
+
+
+def test_parse_line_classification():
+    lines = [
+        "   # indented comment\n",
+        "FOO=bar baz\n",
+        "   \n",
+        "@daily\n",
+        "*/5 * * *\n",
+        "  0 1 * * *  /bin/run  \n",
+    ]
+    jobs = parse_crontab_lines(lines, source="test")
+    assert len(jobs) == 1
+    assert (jobs[0].schedule, jobs[0].command) == ("0 1 * * *", "/bin/run")
+
+
+def test_redact_prefilter():
+    assert redact("/bin/run --keyfile /etc/k") == "/bin/run --keyfile /etc/k"
+    assert redact("cmd TOKEN=abc") == "cmd TOKEN=***"
+    assert "abc" not in redact("cmd secret =abc")
+    assert redact("cmd password\x1c=abc") == "cmd password=***"
+    assert redact("cmd paſsword=abc") == "cmd paſsword=***"
+    assert redact("cmd credentıals=foo") == "cmd credentıals=***"
+    assert redact("cmd credentİals=foo") == "cmd credentİals=***"
+    assert redact("cmd api_\u212aey=foo") == "cmd api_\u212aey=***"
+
+
+def test_secret_hints_cover_re_ignorecase_variants():
+    import itertools
+    from cronhive import _may_contain_secret
+    variants = {"i": "iIİı", "k": "kK\u212a", "s": "sSſ"}
+    for word in ("password", "secret", "token", "apikey", "credentials"):
+        pools = [variants.get(c, c + c.upper()) for c in word]
+        for combo in itertools.product(*pools):
+            cmd = "".join(combo) + "=x"
+            assert SECRET_RE.search(cmd)
+            assert _may_contain_secret(cmd), cmd
+
+
+def test_write_ndjson():
+    import io
+    import json
+    from cronhive import write_ndjson
+    jobs = [
+        CronJob("test", "*/5 * * * *", "/bin/job1", valid=True),
+        CronJob("test", "bad", "/bin/job2", valid=False),
+    ]
+    now = datetime.datetime(2024, 6, 15, 12, 0, 0, tzinfo=datetime.timezone.utc)
+    out = io.StringIO()
+    write_ndjson(jobs, out, now=now)
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert lines[0] == {"generated_at": "2024-06-15T12:00:00Z", "total": 2, "valid": 1, "invalid": 1}
+    assert lines[1:] == [j.to_dict() for j in jobs]
+
+
+def test_parse_interns_source_and_user():
+    text = "*/5 * * * * root /bin/a\n0 1 * * * root /bin/b\n"
+    jobs = parse_crontab(text, source="".join(["/etc/", "crontab"]), system=True)
+    assert jobs[0].source is jobs[1].source
+    assert jobs[0].user is jobs[1].user
+
+
+def test_parse_accepts_non_str_source():
+    import pathlib
+    path = pathlib.Path("/etc/crontab")
+    assert parse_crontab("@daily /bin/a\n", source=path)[0].source is path
+    assert parse_crontab("@daily /bin/a\n", source=None)[0].source is None
+
+
+def test_dead_weekly_schedule():
+    last = datetime.datetime(2024, 6, 3, 5, 0, 0)  # Monday, after the 04:30 run
+    dead, expected = is_dead("30 4 * * 1", last, datetime.datetime(2024, 6, 20, 12, 0, 0))
+    assert expected == datetime.datetime(2024, 6, 10, 4, 30, 0)
+    assert dead is False
+    dead, _ = is_dead("30 4 * * 1", last, datetime.datetime(2024, 6, 25, 12, 0, 0))
+    assert dead is True
+
+
+def test_nth_and_last_weekday_not_weekly():
+    from cronhive import _uniform_interval
+    assert _uniform_interval("0 0 * * 5#2") is None
+    assert _uniform_interval("0 0 * * L5") is None
+    # Second Friday: July 12 run, next expected Aug 9, gap to Sep 13 is five weeks.
+    dead, expected = is_dead(
+        "0 0 * * 5#2", datetime.datetime(2024, 7, 12, 1), datetime.datetime(2024, 8, 25)
+    )
+    assert (dead, expected) == (False, datetime.datetime(2024, 8, 9))
+    dead, _ = is_dead(
+        "0 0 * * L5", datetime.datetime(2024, 6, 28, 1), datetime.datetime(2024, 8, 12)
+    )
+    assert dead is False
+
+
+def test_parse_long_inner_whitespace_run():
+    cmd = "x" + " " * 40000 + "y"
+    jobs = parse_crontab("*/5 * * * * " + cmd + "  \n@daily " + cmd, source="test")
+    assert [j.command for j in jobs] == [cmd, cmd]